@@ -27,7 +27,7 @@ import pandas as pd
 import re
 
 from mosp.leitura_instancia import criar_matriz_padroes_pecas
-from mosp.grafo import construir_grafo
+from mosp.grafo import construir_grafo, construir_csr, listas_adjacencia
 from mosp.custo_nmpa import calcular_nmpa
 from mosp.busca_bfs import bfs
 from mosp.busca_dfs import dfs
@@ -67,7 +67,12 @@ def executar_benchmark(pasta_instancias, caminho_saida_csv, pasta_logs, caminho_
 
             matriz = criar_matriz_padroes_pecas(caminho_instancia)
             grafo = construir_grafo(matriz)
-            lista_adjacencia = {v: list(grafo.neighbors(v)) for v in grafo.nodes()}
+            # CSR compartilhado pelas heurísticas: construído uma vez e cronometrado à parte
+            inicio = time.perf_counter()
+            csr = construir_csr(grafo)
+            tempo_csr = round(time.perf_counter() - inicio, 4)
+
+            lista_adjacencia = listas_adjacencia(csr)
 
             inicio = time.perf_counter()
             ordem_bfs = bfs(lista_adjacencia, vertice_inicial=0)
@@ -78,15 +83,15 @@ def executar_benchmark(pasta_instancias, caminho_saida_csv, pasta_logs, caminho_
             tempo_dfs = round(time.perf_counter() - inicio, 4)
 
             inicio = time.perf_counter()
-            ordem_comunidades, log_comunidades = heuristica_hibrida_comunidades(grafo, limiar_densidade=0.3)
+            ordem_comunidades, log_comunidades = heuristica_hibrida_comunidades(grafo, limiar_densidade=0.3, csr=csr)
             tempo_comunidades = round(time.perf_counter() - inicio, 4)
 
             inicio = time.perf_counter()
-            ordem_pico, log_pico = heuristica_hibrida_adaptativa_pico(grafo, matriz)
+            ordem_pico, log_pico = heuristica_hibrida_adaptativa_pico(grafo, matriz, csr=csr)
             tempo_pico = round(time.perf_counter() - inicio, 4)
 
             inicio = time.perf_counter()
-            ordem_por_componente,log_componentes = heuristica_hibrida_por_componente(grafo, matriz)
+            ordem_por_componente,log_componentes = heuristica_hibrida_por_componente(grafo, matriz, csr=csr)
             tempo_componentes = round(time.perf_counter() - inicio, 4)
 
             nmpa_bfs = calcular_nmpa(ordem_bfs, matriz)
@@ -106,6 +111,7 @@ def executar_benchmark(pasta_instancias, caminho_saida_csv, pasta_logs, caminho_
 
             tempos.append({
                 "Instancia": nome_instancia,
+                "Tempo_CSR (s)": tempo_csr,
                 "Tempo_BFS (s)": tempo_bfs,
                 "Tempo_DFS (s)": tempo_dfs,
                 "Tempo_Comunidades (s)": tempo_comunidades,
@@ -133,7 +139,7 @@ def executar_benchmark(pasta_instancias, caminho_saida_csv, pasta_logs, caminho_
     os.makedirs(os.path.dirname(caminho_tempo_csv), exist_ok=True)
     with open(caminho_tempo_csv, mode='w', newline='') as f:
         writer = csv.DictWriter(f, fieldnames=[
-            "Instancia", "Tempo_BFS (s)", "Tempo_DFS (s)", "Tempo_Comunidades (s)", "Tempo_Pico (s)", "Tempo_Componentes (s)"
+            "Instancia", "Tempo_CSR (s)", "Tempo_BFS (s)", "Tempo_DFS (s)", "Tempo_Comunidades (s)", "Tempo_Pico (s)", "Tempo_Componentes (s)"
         ])
         writer.writeheader()
         writer.writerows(tempos)
@@ -16,7 +16,7 @@ Como rodar:
 import os
 import pandas as pd
 from mosp.leitura_instancia import criar_matriz_padroes_pecas
-from mosp.grafo import construir_grafo
+from mosp.grafo import construir_grafo, construir_csr, listas_adjacencia
 from mosp.custo_nmpa import calcular_nmpa
 from mosp.heuristicas import (
     heuristica_hibrida_comunidades,
@@ -36,33 +36,34 @@ def main():
 
     # 2. Construir o grafo padrão-padrão
     grafo = construir_grafo(matriz)
-    lista_adjacencia = {v: list(grafo.neighbors(v)) for v in grafo.nodes()}
+    csr = construir_csr(grafo)
+    lista_adjacencia = listas_adjacencia(csr)
 
     # 3. SELECIONE A HEURÍSTICA OU BUSCA AQUI
     heuristica = "componentes"  # "comunidades", "pico", "componentes", "bfs", "dfs"
 
     if heuristica == "comunidades":
-        ordem, log_execucao = heuristica_hibrida_comunidades(grafo, limiar_densidade=0.3)
+        ordem, log_execucao = heuristica_hibrida_comunidades(grafo, limiar_densidade=0.3, csr=csr)
         nome_arquivo_log = f"log_comunidades_{nome_instancia}.csv"
 
     elif heuristica == "pico":
-        ordem, log_execucao = heuristica_hibrida_adaptativa_pico(grafo, matriz)
+        ordem, log_execucao = heuristica_hibrida_adaptativa_pico(grafo, matriz, csr=csr)
         nome_arquivo_log = f"log_hibrida_pico_{nome_instancia}.csv"
     
     elif heuristica == "componentes":
-        ordem, log_execucao = heuristica_hibrida_por_componente(grafo,matriz)
+        ordem, log_execucao = heuristica_hibrida_por_componente(grafo, matriz, csr=csr)
         nome_arquivo_log =  f"log_componentes_{nome_instancia}.csv"
 
     elif heuristica == "bfs":
         ordem = bfs(lista_adjacencia, vertice_inicial=0)
-        # Criar log simples
-        log_execucao = [{"Padrao": v, "Busca": "BFS"} for v in ordem]
+        # Criar log simples (colunar, como o das heurísticas)
+        log_execucao = {"Padrao": ordem, "Busca": ["BFS"] * len(ordem)}
         nome_arquivo_log = f"log_bfs_{nome_instancia}.csv"
 
     elif heuristica == "dfs":
         ordem = dfs(lista_adjacencia, vertice_inicial=0)
-        # Criar log simples
-        log_execucao = [{"Padrao": v, "Busca": "DFS"} for v in ordem]
+        # Criar log simples (colunar, como o das heurísticas)
+        log_execucao = {"Padrao": ordem, "Busca": ["DFS"] * len(ordem)}
         nome_arquivo_log = f"log_dfs_{nome_instancia}.csv"
 
     else:
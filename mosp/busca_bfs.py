@@ -2,7 +2,7 @@
 Este arquivo contém as funções de Busca em Largura (BFS) para percorrer o grafo padrão-padrão.
 
 Descrição:
-    - Dadas listas de adjacência ou subgrafos, as funções geram ordens de visitação dos padrões (vértices) utilizando variações da BFS.
+    - Dadas listas de adjacência ou a representação CSR do grafo, as funções geram ordens de visitação dos padrões (vértices) utilizando variações da BFS.
     - A função 'bfs' implementa a BFS clássica pura, garantindo a cobertura de todos os padrões, mesmo em componentes desconexas.
     - A função 'bfs_adaptado' implementa uma BFS aprimorada com ordenação adaptativa dos vizinhos, considerando grau e similaridade de peças, buscando favorecer o agrupamento de padrões relacionados.
 
@@ -13,18 +13,17 @@ Uso no projeto:
 Funções disponíveis:
     - bfs(lista_adjacencia, vertice_inicial):
         Realiza a BFS tradicional sobre o grafo.
-    - bfs_adaptado(subgrafo, no_inicial, matPaPe):
+    - bfs_adaptado(csr, no_inicial, matPaPe, similaridade=None):
         Realiza a BFS adaptativa com priorização baseada em grau e similaridade de peças.
 
 Exemplo de uso:
     from mosp.busca_bfs import bfs, bfs_adaptado
     ordem_bfs = bfs(lista_adjacencia, vertice_inicial)
-    ordem_adapt = bfs_adaptado(subgrafo, no_inicial, matriz_padroes_pecas)
+    ordem_adapt = bfs_adaptado(construir_csr(grafo), no_inicial, matriz_padroes_pecas)
 """
 
 import numpy as np
 from collections import deque
-import random
 
 def bfs(lista_adjacencia, vertice_inicial):
     """
@@ -45,35 +44,46 @@ def bfs(lista_adjacencia, vertice_inicial):
     # Isso garante que a BFS funcione corretamente em subgrafos (ex: comunidades),
     # onde os vértices podem ser qualquer conjunto de índices.
     todos_vertices = list(lista_adjacencia.keys())
+    total_vertices = len(todos_vertices)
 
     visitados = set()
     ordem = []
-    fila = [vertice_inicial]
+    # Fila FIFO com popleft() O(1) e conjunto espelho dos vértices enfileirados: o teste
+    # "já está na fila" deixa de varrer a fila inteira a cada vizinho examinado
+    fila = deque([vertice_inicial])
+    na_fila = {vertice_inicial}
 
     # Enquanto ainda houver vértices não visitados
     while todos_vertices:
         # Enquanto a fila não estiver vazia
         while fila:
-            vertice_atual = fila.pop(0)
+            # Todos os vértices já visitados: o restante da fila só teria repetidos
+            if len(visitados) == total_vertices:
+                break
+
+            vertice_atual = fila.popleft()
+            na_fila.discard(vertice_atual)
 
             if vertice_atual not in visitados:
                 visitados.add(vertice_atual)
                 ordem.append(vertice_atual)
 
                 for vizinho in sorted(lista_adjacencia[vertice_atual]):
-                    if vizinho not in visitados and vizinho not in fila:
+                    if vizinho not in visitados and vizinho not in na_fila:
                         fila.append(vizinho)
+                        na_fila.add(vizinho)
 
         # Após terminar um componente, atualiza a lista de vértices não visitados
         todos_vertices = list(set(todos_vertices) - visitados)
 
         # Se ainda houver vértices não visitados, começa nova BFS por outro componente
         if todos_vertices:
-            fila = [todos_vertices[0]]
+            fila = deque([todos_vertices[0]])
+            na_fila = {todos_vertices[0]}
 
     return ordem
 
-def bfs_adaptado(subgrafo, no_inicial, matPaPe):
+def bfs_adaptado(csr, no_inicial, matPaPe, similaridade=None):
     """
     Executa uma busca em largura (BFS) otimizada para grafos densos.
 
@@ -86,8 +96,11 @@ def bfs_adaptado(subgrafo, no_inicial, matPaPe):
     
     - A BFS explora os vizinhos próximos antes de se afastar, mantendo grupos de vértices "relacionados" mais unidos na sequência.
     - Isso reduz o risco de abrir pilhas novas cedo demais, favorecendo a minimização do NMPA no MOSP.
+
+    Vizinhos e graus saem do CSR do grafo; `similaridade` (de matriz_similaridade), se informado, fornece os pesos.
     """
 
+    indptr, indices = csr
     visitados = set()                   # Conjunto de nós já visitados
     fila = deque([no_inicial])         # Fila para BFS (estrutura FIFO)
     sequencia = []                     # Sequência final de visitação
@@ -99,11 +112,15 @@ def bfs_adaptado(subgrafo, no_inicial, matPaPe):
             sequencia.append(no_atual)
 
             # Seleciona vizinhos ainda não visitados
-            vizinhos = [v for v in subgrafo.neighbors(no_atual) if v not in visitados]
+            vizinhos = [v for v in indices[indptr[no_atual]:indptr[no_atual + 1]].tolist() if v not in visitados]
             if vizinhos:
                 # Calcula o grau e a similaridade com o nó atual
-                graus = np.array([subgrafo.degree(v) for v in vizinhos])
-                similaridades = np.sum(matPaPe[no_atual] & matPaPe[vizinhos], axis=1)
+                graus = indptr[np.add(vizinhos, 1)] - indptr[vizinhos]
+                if similaridade is not None:
+                    S, posicao = similaridade
+                    similaridades = S[posicao[no_atual], posicao[vizinhos]]
+                else:
+                    similaridades = np.count_nonzero(matPaPe[no_atual] & matPaPe[vizinhos], axis=1)
 
                 # Combinação ponderada entre grau e similaridade
                 pesos = 0.6 * graus + 0.4 * similaridades
@@ -4,9 +4,9 @@
 Este arquivo contém as funções de Busca em Profundidade (DFS) para percorrer o grafo padrão-padrão.
 
 Descrição:
-    - Dadas listas de adjacência ou subgrafos, as funções geram ordens de visitação dos padrões (vértices) utilizando variações da DFS.
+    - Dadas listas de adjacência ou a representação CSR do grafo, as funções geram ordens de visitação dos padrões (vértices) utilizando variações da DFS.
     - A função 'dfs' implementa a DFS clássica pura, garantindo a cobertura de todos os padrões, mesmo em componentes desconexas.
-    - A função 'dfs_limitado' implementa uma DFS com profundidade máxima controlada, priorizando vizinhos com maior similaridade de peças, de modo a balancear exploração e fechamento precoce de pilhas.
+    - A função 'dfs_adaptado' implementa uma DFS com profundidade máxima controlada, priorizando vizinhos com maior similaridade de peças, de modo a balancear exploração e fechamento precoce de pilhas.
 
 Uso no projeto:
     - As buscas geram ordens de produção que serão avaliadas com a função de custo (NMPA).
@@ -15,13 +15,13 @@ Uso no projeto:
 Funções disponíveis:
     - dfs(lista_adjacencia, vertice_inicial):
         - Realiza a DFS tradicional sobre o grafo.
-    - dfs_limitado(subgrafo, no_inicial, visitados, matPaPe, limite=2):
+    - dfs_adaptado(csr, no_inicial, matPaPe, limite=2, similaridade=None):
         - Realiza uma DFS limitada em profundidade, priorizando vizinhos mais similares na escolha de expansão.
 
 Exemplo de uso:
-    from mosp.busca_dfs import dfs, dfs_limitado
+    from mosp.busca_dfs import dfs, dfs_adaptado
     ordem_dfs = dfs(lista_adjacencia, vertice_inicial)
-    ordem_limitada = dfs_limitado(subgrafo, no_inicial, visitados, matriz_padroes_pecas, limite=2)
+    ordem_limitada = dfs_adaptado(construir_csr(grafo), no_inicial, matriz_padroes_pecas, limite=2)
 """
 
 import numpy as np
@@ -42,6 +42,7 @@ def dfs(lista_adjacencia, vertice_inicial):
     """
     # Correção: pegar os vértices reais, não um range de 0 até N-1
     todos_vertices = list(lista_adjacencia.keys())
+    total_vertices = len(todos_vertices)
 
     visitados = []
     pilha = [vertice_inicial]
@@ -50,6 +51,10 @@ def dfs(lista_adjacencia, vertice_inicial):
     while todos_vertices:
         # Enquanto a pilha não estiver vazia
         while pilha:
+            # Todos os vértices já visitados: o restante da pilha seria só retrocesso
+            if len(visitados) == total_vertices:
+                break
+
             vertice_atual = pilha[0]
 
             if vertice_atual not in visitados:
@@ -73,7 +78,7 @@ def dfs(lista_adjacencia, vertice_inicial):
 
     return visitados
 
-def dfs_adaptado(subgrafo, no_inicial, matPaPe, limite=2):
+def dfs_adaptado(csr, no_inicial, matPaPe, limite=2, similaridade=None):
     """
     Executa uma busca em profundidade (DFS) otimizada com profundidade limitada.
 
@@ -87,8 +92,11 @@ def dfs_adaptado(subgrafo, no_inicial, matPaPe, limite=2):
     Racional do limite:
     - Limitar a profundidade evita que a DFS vá longe demais em caminhos ruins.
     - Um limite pequeno (ex: 2) já oferece controle e evita explorações "exageradas".
+
+    Vizinhos saem do CSR do grafo; `similaridade` (de matriz_similaridade), se informado, ordena a pilha.
     """
 
+    indptr, indices = csr
     pilha = [(no_inicial, 0)]          # Pilha para DFS (estrutura LIFO), armazenando também a profundidade atual
     visitados = set()                  # Conjunto de nós já visitados
     sequencia = []                     # Sequência final de visitação
@@ -101,10 +109,14 @@ def dfs_adaptado(subgrafo, no_inicial, matPaPe, limite=2):
 
             if profundidade < limite:
                 # Seleciona vizinhos ainda não visitados
-                vizinhos = [v for v in subgrafo.neighbors(no_atual) if v not in visitados]
+                vizinhos = [v for v in indices[indptr[no_atual]:indptr[no_atual + 1]].tolist() if v not in visitados]
                 if vizinhos:
                     # Similaridade entre o nó atual e os vizinhos
-                    similaridades = np.sum(matPaPe[no_atual] & matPaPe[vizinhos], axis=1)
+                    if similaridade is not None:
+                        S, posicao = similaridade
+                        similaridades = S[posicao[no_atual], posicao[vizinhos]]
+                    else:
+                        similaridades = np.count_nonzero(matPaPe[no_atual] & matPaPe[vizinhos], axis=1)
 
                     # Ordena vizinhos pela similaridade decrescente (mais parecidos primeiro)
                     ordenados = [v for _, v in sorted(zip(similaridades, vizinhos), reverse=True)]
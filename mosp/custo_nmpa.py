@@ -1,27 +1,149 @@
+"""
+Este arquivo contém as funções de custo (NMPA - Número Máximo de Pilhas Abertas) do MOSP.
 
+Descrição:
+    - Uma pilha (peça) está aberta em uma etapa se a peça já foi usada por algum padrão
+      anterior ou atual e ainda será usada por algum padrão atual ou posterior.
+    - O NMPA de uma ordem é o maior número de pilhas abertas simultaneamente.
+    - As linhas da matriz padrão x peça podem ser empacotadas em bits (64 peças por palavra
+      uint64), o que reduz em 8x os bytes lidos em relação à matriz booleana e em 32x em relação
+      à matriz int32; quem avalia muitas ordens sobre a mesma matriz empacota uma única vez.
+
+Funções disponíveis:
+    - calcular_nmpa(ordering, matriz)
+    - calcular_nmpa_bits(ordering, matriz_bits)
+    - empacotar_matriz(matriz)
+    - contar_bits(bits)
+    - NMPAIncremental(matriz): acompanha as pilhas abertas padrão a padrão.
+
+Exemplo de uso:
+    from mosp.custo_nmpa import calcular_nmpa, calcular_nmpa_bits, empacotar_matriz
+    nmpa = calcular_nmpa(ordem, matriz)
+    matriz_bits = empacotar_matriz(matriz)
+    nmpa = calcular_nmpa_bits(ordem, matriz_bits)
+"""
 
 import numpy as np
 
-def calcular_nmpa(ordering, matriz):
+if hasattr(np, "bitwise_count"):
+    def contar_bits(bits):
+        """Conta os bits 1 de cada linha (último eixo) de um array uint64."""
+        return np.bitwise_count(bits).sum(axis=-1, dtype=np.int64)
+else:
+    # NumPy < 2.0: contagem por tabela de 256 entradas sobre os bytes de cada palavra
+    _BITS_POR_BYTE = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
 
-    if len(ordering) > 1:
-        # Seleciona as linhas da matriz na ordem desejada
-        matriz_ordenada = matriz[ordering, :]
+    def contar_bits(bits):
+        """Conta os bits 1 de cada linha (último eixo) de um array uint64."""
+        bits = np.ascontiguousarray(bits)
+        return _BITS_POR_BYTE[bits.view(np.uint8)].sum(axis=-1, dtype=np.int64)
 
-        # Calcula o "acúmulo para frente" e "acúmulo para trás" para cada peça
-        acumulado_frente = np.maximum.accumulate(matriz_ordenada, axis=0)
-        acumulado_tras = np.maximum.accumulate(matriz_ordenada[::-1, :], axis=0)[::-1, :]
+def empacotar_matriz(matriz):
+    """
+    Empacota a matriz padrão x peça em bits.
 
-        # Uma pilha está aberta se a peça já foi usada e ainda será usada
-        pilhas_abertas = acumulado_frente & acumulado_tras
+    Args:
+        matriz: Matriz padrão x peça (n_padroes x n_pecas).
 
-        # Conta quantas pilhas abertas existem em cada etapa
-        pilhas_abertas_por_etapa = np.sum(pilhas_abertas, axis=1)
-    else:
-        # Caso trivial: apenas um padrão na ordem
-        matriz_ordenada = matriz_padroes_pecas[ordering, :]
-        pilhas_abertas_por_etapa = [np.sum(matriz_ordenada)]
+    Returns:
+        matriz_bits: Array uint64 (n_padroes x ceil(n_pecas / 64)); o bit j da linha i
+                     indica se o padrão i utiliza a peça j.
+    """
+    bytes_linhas = np.packbits(np.asarray(matriz) > 0, axis=1, bitorder="little")
+    complemento = (-bytes_linhas.shape[1]) % 8
+    if complemento:
+        bytes_linhas = np.pad(bytes_linhas, ((0, 0), (0, complemento)))
+    return np.ascontiguousarray(bytes_linhas).view(np.uint64)
+
+def _nmpa_linhas_empacotadas(linhas_bits):
+    """NMPA das linhas empacotadas, já na ordem de produção."""
+    # Calcula o "acúmulo para frente" e "acúmulo para trás" (OR bit a bit) para cada palavra de peças
+    acumulado_frente = np.bitwise_or.accumulate(linhas_bits, axis=0)
+    acumulado_tras = np.bitwise_or.accumulate(linhas_bits[::-1], axis=0)[::-1]
+
+    # Uma pilha está aberta se a peça já foi usada e ainda será usada;
+    # conta quantas pilhas abertas existem em cada etapa
+    pilhas_abertas_por_etapa = contar_bits(acumulado_frente & acumulado_tras)
 
     # Retorna o número máximo de pilhas abertas ao longo da produção
-    nmpa = np.amax(pilhas_abertas_por_etapa)
-    return nmpa
+    return np.amax(pilhas_abertas_por_etapa)
+
+def calcular_nmpa(ordering, matriz):
+    """
+    Calcula o NMPA (Número Máximo de Pilhas Abertas) de uma ordem de produção.
+
+    O cálculo é vetorizado: as linhas da ordem são empacotadas em bits e as pilhas abertas
+    saem de duas varreduras acumuladas (OR bit a bit), sem laços em Python.
+
+    Args:
+        ordering: Sequência de índices de padrões (lista ou array).
+        matriz: Matriz padrão x peça.
+
+    Returns:
+        nmpa: Número máximo de pilhas abertas ao longo da produção.
+    """
+    if len(ordering) == 0:
+        return 0
+
+    # Seleciona as linhas da matriz na ordem desejada e empacota apenas essas linhas
+    return _nmpa_linhas_empacotadas(empacotar_matriz(matriz[ordering, :]))
+
+def calcular_nmpa_bits(ordering, matriz_bits):
+    """
+    Calcula o NMPA de uma ordem sobre a matriz já empacotada por `empacotar_matriz`.
+
+    Mesmo resultado de calcular_nmpa(ordering, matriz), sem reempacotar a matriz a cada chamada.
+    """
+    if len(ordering) == 0:
+        return 0
+
+    return _nmpa_linhas_empacotadas(matriz_bits[ordering])
+
+class NMPAIncremental:
+    """
+    Acompanha as pilhas abertas enquanto a sequência é montada, um padrão por vez.
+
+    Ideia central:
+    - Uma pilha (peça) abre no primeiro padrão que a utiliza e fecha quando o último
+      padrão que a utiliza é produzido.
+    - Mantendo, para cada peça, quantos padrões que a utilizam ainda não foram
+      sequenciados, cada novo padrão atualiza o estado em O(peças) em vez de
+      recalcular o NMPA de todo o prefixo (O(tamanho do prefixo x peças)).
+
+    Pressupõe que todos os padrões da matriz serão sequenciados (uma única vez);
+    assim, as pilhas abertas em cada etapa são exatamente as da sequência completa
+    e `nmpa` ao final coincide com calcular_nmpa(sequencia, matriz).
+    """
+
+    def __init__(self, matriz):
+        self.matriz = matriz
+        self.restantes = np.sum(matriz > 0, axis=0)             # Padrões ainda não sequenciados por peça
+        self.abertas = np.zeros(matriz.shape[1], dtype=bool)  # Peças com pilha aberta
+        self.num_abertas = 0
+        self.nmpa = 0                                         # Máximo de pilhas abertas até agora
+
+    def adicionar(self, padrao):
+        """
+        Adiciona um padrão ao final da sequência.
+
+        Returns:
+            Número de pilhas abertas durante a produção do padrão.
+        """
+        pecas = np.flatnonzero(self.matriz[padrao])
+
+        # Abre as pilhas das peças que aparecem pela primeira vez
+        novas = pecas[~self.abertas[pecas]]
+        self.abertas[novas] = True
+        self.num_abertas += len(novas)
+
+        abertas_etapa = self.num_abertas
+        if abertas_etapa > self.nmpa:
+            self.nmpa = abertas_etapa
+
+        # Fecha as pilhas cujo último padrão acabou de ser produzido
+        self.restantes[pecas] -= 1
+        fechadas = pecas[self.restantes[pecas] == 0]
+        self.abertas[fechadas] = False
+        self.num_abertas -= len(fechadas)
+
+        return abertas_etapa
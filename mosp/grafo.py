@@ -10,12 +10,16 @@ Fluxo típico:
     2. Esta matriz é passada para a função `construir_grafo`.
     3. A função retorna um grafo NetworkX (nx.Graph), que pode ser explorado com algoritmos de busca, heurísticas, etc.
 
-Função disponível:
+Funções disponíveis:
     - construir_grafo(matriz_padroes_pecas)
+    - construir_csr(grafo)
+    - listas_adjacencia(csr)
+    - calcular_densidade(num_vertices, num_arestas)
 
 Exemplo de uso:
-    from mosp.grafo import construir_grafo
+    from mosp.grafo import construir_grafo, construir_csr
     grafo = construir_grafo(matriz_padroes_pecas)
+    indptr, indices = construir_csr(grafo)
 """
 
 import networkx as nx
@@ -49,3 +53,61 @@ def construir_grafo(matriz_padroes_pecas):
                 grafo.add_edge(padrao_i, padrao_j)
 
     return grafo
+
+def construir_csr(grafo):
+    """
+    Converte o grafo padrão-padrão para a representação CSR (Compressed Sparse Row).
+
+    Args:
+        grafo: Objeto nx.Graph cujos vértices são os inteiros 0..n-1
+               (como gerado por `construir_grafo`).
+
+    Returns:
+        (indptr, indices): Vetores np.int32, onde os vizinhos do vértice v são
+                           indices[indptr[v]:indptr[v + 1]] (na mesma ordem de
+                           grafo.neighbors(v)) e o grau de v é indptr[v + 1] - indptr[v].
+
+    Racional:
+        - As buscas percorrem vizinhanças muitas vezes; no NetworkX cada acesso
+          passa por dicionários (e views de subgrafo), enquanto no CSR a vizinhança
+          é uma fatia contígua de um vetor, sem alocação nem consulta a dicionário.
+    """
+    num_padroes = grafo.number_of_nodes()
+
+    graus = np.fromiter((grafo.degree(v) for v in range(num_padroes)), dtype=np.int32, count=num_padroes)
+    indptr = np.zeros(num_padroes + 1, dtype=np.int32)
+    np.cumsum(graus, out=indptr[1:])
+
+    indices = np.fromiter(
+        (vizinho for v in range(num_padroes) for vizinho in grafo.neighbors(v)),
+        dtype=np.int32,
+        count=int(indptr[-1])
+    )
+
+    return indptr, indices
+
+def listas_adjacencia(csr):
+    """
+    Converte o CSR de `construir_csr` em listas de adjacência {vértice: [vizinhos]}.
+
+    Formato esperado por busca_bfs.bfs e busca_dfs.dfs; cada lista é uma fatia do CSR,
+    na mesma ordem de grafo.neighbors(v).
+    """
+    indptr, indices = csr
+    return {v: indices[indptr[v]:indptr[v + 1]].tolist() for v in range(len(indptr) - 1)}
+
+def calcular_densidade(num_vertices, num_arestas):
+    """
+    Densidade de um (sub)grafo não direcionado a partir das contagens de vértices e arestas.
+
+    Mesma fórmula (e mesma aritmética) de nx.density, mas sem construir uma view de
+    subgrafo: as contagens saem direto do CSR (a soma dos graus internos é 2 * arestas).
+
+    Returns:
+        2 * arestas / (vértices * (vértices - 1)), ou 0 para grafos sem arestas ou com até 1 vértice.
+    """
+    if num_arestas == 0 or num_vertices <= 1:
+        return 0
+    densidade = num_arestas / (num_vertices * (num_vertices - 1))
+    densidade *= 2
+    return densidade
@@ -11,11 +11,16 @@ Descrição geral:
 Uso no projeto:
     - As heurísticas geram ordens de produção que são avaliadas com a função de custo (NMPA).
     - Servem de base para o benchmark comparativo de desempenho.
+    - O log de execução é colunar (dicionário {coluna: lista de valores}, uma posição por
+      linha), evitando um dicionário por padrão; pd.DataFrame(log_execucao) gera a tabela.
 
 Funções disponíveis:
-    - heuristica_hibrida_comunidades(grafo, limiar_densidade=0.3)
-    - heuristica_hibrida_adaptativa_pico(grafo, matriz, limiar_densidade=0.3)
-    - heuristica_hibrida_por_componente(grafo, matPaPe)
+    - heuristica_hibrida_comunidades(grafo, limiar_densidade=0.3, csr=None)
+    - heuristica_hibrida_adaptativa_pico(grafo, matriz, limiar_densidade=0.3, csr=None, log_nmpa_parcial=True)
+    - heuristica_hibrida_por_componente(grafo, matPaPe, csr=None)
+
+    Todas aceitam opcionalmente o CSR do grafo (grafo.construir_csr), para que ele seja
+    construído uma única vez por instância e compartilhado entre as heurísticas.
 
 Exemplo de uso:
     from mosp.heuristicas import (
@@ -30,52 +35,75 @@ Exemplo de uso:
 """
 
 import networkx as nx
-import random
+from collections import deque
 
 import numpy as np
-from mosp.busca_bfs import bfs, bfs_adaptado
-from mosp.busca_dfs import dfs,dfs_adaptado
-
-
 from mosp.busca_bfs import bfs, bfs_adaptado
 from mosp.busca_dfs import dfs, dfs_adaptado
-
-from mosp.metricas import ordenacao_rapida,melhores_nos_iniciais
+from mosp.grafo import construir_csr, calcular_densidade
+from mosp.metricas import ordenacao_rapida_graus, precalcular_nos_iniciais, matriz_similaridade
 from mosp.refinamento import refinamento_minimo
-from mosp.custo_nmpa import calcular_nmpa
+from mosp.custo_nmpa import calcular_nmpa, calcular_nmpa_bits, contar_bits, empacotar_matriz, NMPAIncremental
+
+try:
+    # Louvain (NetworkX >= 2.8): quase linear em grafos esparsos
+    from networkx.algorithms.community import louvain_communities
+except ImportError:
+    louvain_communities = None
 from networkx.algorithms.community import greedy_modularity_communities
 
-def heuristica_hibrida_comunidades(grafo, limiar_densidade=0.3):
+def heuristica_hibrida_comunidades(grafo, limiar_densidade=0.3, csr=None):
     """
     Gera uma ordem de produção utilizando comunidades (regiões densas).
 
-    - Detecta comunidades internas com mais conexões internas do que externas.
+    - Detecta comunidades internas com mais conexões internas do que externas
+      (Louvain com semente fixa; greedy_modularity_communities em NetworkX antigo).
     - Em cada comunidade:
+        - A busca começa pelo padrão de maior grau dentro da comunidade.
         - Se densidade >= limiar: aplica BFS.
         - Caso contrário: aplica DFS.
 
     Args:
         grafo: Objeto nx.Graph.
         limiar_densidade: Limite para decidir BFS ou DFS.
+        csr: (opcional) Par (indptr, indices) de construir_csr(grafo); construído aqui se omitido.
 
     Returns:
         ordem_final: Lista de padrões (vértices).
-        log_execucao: Lista de dicionários com log da busca em cada padrão.
+        log_execucao: Log colunar {"Padrao", "Busca", "DensidadeRegiao"}, uma posição por padrão.
     """
-    visitados = set()
-    ordem_final = []
-    log_execucao = []
+    # Ordem montada em um array int32 pré-alocado com cursor de escrita: cada comunidade
+    # é copiada em bloco, e o array já serve de entrada para a diferença de conjuntos final
+    ordem_final = np.empty(grafo.number_of_nodes(), dtype=np.int32)
+    tamanho_final = 0
+    log_execucao = {"Padrao": [], "Busca": [], "DensidadeRegiao": []}
+
+    if csr is None:
+        csr = construir_csr(grafo)
+    indptr, indices = csr
 
     # Detectar comunidades
-    comunidades = list(greedy_modularity_communities(grafo))
+    # O Louvain chega a partições de modularidade equivalente (ou maior) à do método guloso,
+    # que é o gargalo da heurística em grafos grandes; a semente fixa mantém o resultado reprodutível
+    if louvain_communities is not None:
+        comunidades = louvain_communities(grafo, seed=0)
+    else:
+        comunidades = list(greedy_modularity_communities(grafo))
 
     # Processar cada comunidade
     for comunidade in comunidades:
-        subgrafo = grafo.subgraph(comunidade)
-        densidade = nx.density(subgrafo)
-        vertice_inicio = next(iter(comunidade))
+        # Vizinhanças restritas à comunidade, filtradas a partir das fatias do CSR
+        lista_adjacencia = {
+            v: [u for u in indices[indptr[v]:indptr[v + 1]].tolist() if u in comunidade]
+            for v in comunidade
+        }
 
-        lista_adjacencia = {v: list(subgrafo.neighbors(v)) for v in subgrafo.nodes()}
+        # Densidade a partir das próprias listas (cada aresta interna aparece duas vezes)
+        num_arestas = sum(len(vizinhos) for vizinhos in lista_adjacencia.values()) // 2
+        densidade = calcular_densidade(len(comunidade), num_arestas)
+
+        # Começa pelo padrão de maior grau dentro da comunidade (em vez de um vértice arbitrário)
+        vertice_inicio = max(lista_adjacencia, key=lambda v: len(lista_adjacencia[v]))
 
         if densidade >= limiar_densidade:
             ordem = bfs(lista_adjacencia, vertice_inicio)
@@ -84,29 +112,27 @@ def heuristica_hibrida_comunidades(grafo, limiar_densidade=0.3):
             ordem = dfs(lista_adjacencia, vertice_inicio)
             tipo_busca = "DFS"
 
-        for padrao in ordem:
-            log_execucao.append({
-                "Padrao": padrao,
-                "Busca": tipo_busca,
-                "DensidadeRegiao": densidade
-            })
-
-        ordem_final.extend(ordem)
-        visitados.update(ordem)
-
-    # Garantir que todos os vértices estejam na ordem (caso alguma parte não detectada em comunidade)
-    for vertice in grafo.nodes():
-        if vertice not in visitados:
-            ordem_final.append(vertice)
-            log_execucao.append({
-                "Padrao": vertice,
-                "Busca": "SemComunidade",
-                "DensidadeRegiao": 0.0
-            })
+        log_execucao["Padrao"].extend(ordem)
+        log_execucao["Busca"].extend([tipo_busca] * len(ordem))
+        log_execucao["DensidadeRegiao"].extend([densidade] * len(ordem))
 
-    return ordem_final, log_execucao
+        ordem_final[tamanho_final:tamanho_final + len(ordem)] = ordem
+        tamanho_final += len(ordem)
+
+    # Garantir que todos os vértices estejam na ordem (caso alguma parte não detectada em comunidade):
+    # as comunidades são disjuntas, então uma única diferença de conjuntos vetorizada basta
+    faltantes = np.setdiff1d(
+        np.arange(grafo.number_of_nodes()), ordem_final[:tamanho_final], assume_unique=True
+    ).tolist()
+    ordem_final[tamanho_final:tamanho_final + len(faltantes)] = faltantes
+    tamanho_final += len(faltantes)
+    log_execucao["Padrao"].extend(faltantes)
+    log_execucao["Busca"].extend(["SemComunidade"] * len(faltantes))
+    log_execucao["DensidadeRegiao"].extend([0.0] * len(faltantes))
+
+    return ordem_final[:tamanho_final].tolist(), log_execucao
 
-def heuristica_hibrida_adaptativa_pico(grafo, matriz, limiar_densidade=0.3):
+def heuristica_hibrida_adaptativa_pico(grafo, matriz, limiar_densidade=0.3, csr=None, log_nmpa_parcial=True):
     """
     Gera uma ordem de produção utilizando uma heurística híbrida adaptativa baseada na evolução do NMPA.
 
@@ -117,6 +143,16 @@ def heuristica_hibrida_adaptativa_pico(grafo, matriz, limiar_densidade=0.3):
             - Monitora a evolução do NMPA à medida que a sequência é construída.
             - Quando o NMPA atinge valores próximos do seu pico (ou janela de pico), a estratégia é alterada para BFS, favorecendo o fechamento simultâneo de pilhas restantes.
 
+    NMPA parcial:
+        - É mantido de forma incremental: a cada padrão, abre as pilhas das peças novas e
+          fecha as pilhas cujas peças não são usadas por nenhum padrão ainda não sequenciado.
+        - Assim, o valor registrado em cada passo é o máximo de pilhas realmente abertas
+          até aquele ponto da produção, e o último valor é o NMPA da ordem final.
+        - Depois da troca para BFS o NMPA parcial não influencia mais a busca, só o log.
+          Com log_nmpa_parcial=False o acompanhamento é interrompido nesse ponto: os passos
+          seguintes registram None e o último passo recebe o NMPA da ordem final, calculado
+          uma única vez ao término.
+
     Diferenças em relação às heurísticas anteriores:
         - Enquanto a 'heuristica_hibrida_comunidades' toma a decisão BFS/DFS com base na densidade de cada subestrutura, esta heurística adapta a estratégia dinamicamente com base no comportamento do próprio NMPA durante a execução.
         - A matriz padrão-peça é necessária para o cálculo contínuo do NMPA.
@@ -125,61 +161,82 @@ def heuristica_hibrida_adaptativa_pico(grafo, matriz, limiar_densidade=0.3):
         grafo: Objeto nx.Graph (grafo padrão-padrão).
         matriz: Matriz padrão-peça (necessária para cálculo do NMPA).
         limiar_densidade: (opcional) não é utilizado diretamente nesta heurística.
+        csr: (opcional) Par (indptr, indices) de construir_csr(grafo); construído aqui se omitido.
+        log_nmpa_parcial: (opcional) Se False, não acompanha o NMPA parcial após a troca para BFS.
 
     Returns:
         ordem_final: Lista de padrões (vértices) na ordem gerada.
-        log_execucao: Lista de dicionários com log detalhado da busca (padrão, tipo de busca, NMPA parcial).
+        log_execucao: Log colunar {"Padrao", "Busca", "NMPA_Parcial"}, uma posição por padrão.
     """
 
-    visitados = set()
+    # Vetor booleano indexado pelo padrão (vértices 0..n-1): permite filtrar os vizinhos
+    # já visitados de uma vez, com indexação booleana, em vez de consultas a um set
+    visitado = np.zeros(grafo.number_of_nodes(), dtype=bool)
     ordem_final = []
-    log_execucao = []
+    log_execucao = {"Padrao": [], "Busca": [], "NMPA_Parcial": []}
 
     nmpa_parcial = 0
     nmpa_max = 0
     uso_bfs = False # Flag para indicar se já começamos a usar BFS
 
+    # Estado incremental das pilhas abertas (evita recalcular o NMPA do prefixo a cada passo)
+    estado_nmpa = NMPAIncremental(matriz)
+
+    # Vizinhanças em CSR: dentro de um componente conexo, os vizinhos no grafo
+    # inteiro são exatamente os vizinhos no subgrafo do componente
+    if csr is None:
+        csr = construir_csr(grafo)
+    indptr, indices = csr
+
     # Começa pelo componente principal
     for componente in nx.connected_components(grafo):
-        componentes_nao_visitados = [v for v in componente if v not in visitados]
+        componentes_nao_visitados = [v for v in componente if not visitado[v]]
         if not componentes_nao_visitados:
             continue
 
-        subgrafo = grafo.subgraph(componentes_nao_visitados)
         vertice_inicio = componentes_nao_visitados[0]
-        lista_adjacencia = {v: list(subgrafo.neighbors(v)) for v in subgrafo.nodes()}
+        tamanho_comp = len(componentes_nao_visitados)
+        visitados_comp = 0
 
-        # Vamos usar uma lista "agenda" de padrões a explorar
+        # Vamos usar uma "agenda" (deque) de padrões a explorar: pop() no fim para DFS
+        # e popleft() no início para BFS, ambos O(1)
         # Começamos com DFS (pilha)
-        agenda = [vertice_inicio]
+        agenda = deque([vertice_inicio])
         tipo_busca = "DFS"
 
         while agenda:
+            # Componente conexo já coberto: o restante da agenda só teria padrões visitados
+            if visitados_comp == tamanho_comp:
+                break
+
             if tipo_busca == "DFS":
                 padrao = agenda.pop() # Pilha (último elemento)
             else:
-                padrao = agenda.pop(0) # Fila (primeiro elemento) - vira BFS
+                padrao = agenda.popleft() # Fila (primeiro elemento) - vira BFS
 
-            if padrao in visitados:
+            if visitado[padrao]:
                 continue
 
             # Marca como visitado e adiciona à ordem
-            visitados.add(padrao)
+            visitado[padrao] = True
+            visitados_comp += 1
             ordem_final.append(padrao)
 
-            # Atualiza NMPA parcial
-            nmpa_parcial = calcular_nmpa(ordem_final, matriz)
+            # Atualiza NMPA parcial (máximo de pilhas abertas até este padrão)
+            if log_nmpa_parcial or not uso_bfs:
+                estado_nmpa.adicionar(padrao)
+                nmpa_parcial = estado_nmpa.nmpa
+            else:
+                nmpa_parcial = None
 
             # Atualiza o NMPA máximo observado
-            if nmpa_parcial > nmpa_max:
+            if nmpa_parcial is not None and nmpa_parcial > nmpa_max:
                 nmpa_max = nmpa_parcial
 
             # Log do passo
-            log_execucao.append({
-                "Padrao": padrao,
-                "Busca": tipo_busca,
-                "NMPA_Parcial": nmpa_parcial
-            })
+            log_execucao["Padrao"].append(padrao)
+            log_execucao["Busca"].append(tipo_busca)
+            log_execucao["NMPA_Parcial"].append(nmpa_parcial)
 
             # Se atingimos o pico muda para BFS
             # Aqui podemos ajustar o critério: ex. muda para BFS quando o NMPA atual >= 95% do NMPA máximo observado até agora
@@ -188,19 +245,53 @@ def heuristica_hibrida_adaptativa_pico(grafo, matriz, limiar_densidade=0.3):
                 uso_bfs = True
 
             # Adiciona vizinhos não visitados à agenda
-            vizinhos = [v for v in lista_adjacencia[padrao] if v not in visitados]
+            vizinhos = indices[indptr[padrao]:indptr[padrao + 1]]
+            vizinhos = vizinhos[~visitado[vizinhos]].tolist()
 
             if tipo_busca == "DFS":
-                agenda.extend(vizinhos[::-1]) # Para DFS, adiciona na ordem inversa
+                agenda.extend(reversed(vizinhos)) # Para DFS, adiciona na ordem inversa
             else:
                 agenda.extend(vizinhos) # Para BFS, adiciona no final da fila
 
+    # Sem acompanhamento após a troca, o NMPA da ordem completa é calculado uma única vez
+    if ordem_final and log_execucao["NMPA_Parcial"][-1] is None:
+        log_execucao["NMPA_Parcial"][-1] = calcular_nmpa(ordem_final, matriz)
+
     return ordem_final, log_execucao
 
 
 
 
-def heuristica_hibrida_por_componente(grafo, matPaPe):
+def _avaliar_nos_iniciais(csr, nos_iniciais, matPaPe, matPaPe_bits, densidade, similaridade, nmpa_prefixo):
+    """
+    Avalia o multi-start de um componente: uma busca adaptada por nó inicial.
+
+    - A escolha BFS/DFS depende só da densidade do componente, então é feita
+      uma única vez, fora do laço.
+    - Cada nó inicial é avaliado de forma independente (mesmo CSR, mesma matriz de
+      similaridade e mesmo NMPA da sequência já montada), o que mantém o laço isolado
+      caso se queira paralelizá-lo.
+    - `nmpa_prefixo` é o NMPA da sequência já montada. Como componentes distintos não
+      compartilham peças, o NMPA de prefixo + seq é max(nmpa_prefixo, NMPA de seq):
+      cada candidato é avaliado só sobre os seus próprios padrões.
+
+    Returns:
+        Lista de tuplas (nmpa, sequencia, tipo_busca), uma por nó inicial.
+    """
+    if densidade > 0.4:
+        busca, tipo_busca = bfs_adaptado, "BFS"
+    else:
+        busca, tipo_busca = dfs_adaptado, "DFS"
+
+    resultados = []
+    for no_inicial in nos_iniciais:
+        seq = busca(csr, no_inicial, matPaPe, similaridade=similaridade)
+        nmpa_seq = max(nmpa_prefixo, int(calcular_nmpa_bits(seq, matPaPe_bits)))
+        resultados.append((nmpa_seq, seq, tipo_busca))
+
+    return resultados
+
+def heuristica_hibrida_por_componente(grafo, matPaPe, csr=None):
     """
     Heurística híbrida BFS/DFS adaptativa por componente conexo do grafo.
 
@@ -216,73 +307,103 @@ def heuristica_hibrida_por_componente(grafo, matPaPe):
     - A abordagem por componente melhora a escalabilidade.
     - A escolha BFS/DFS adaptativa melhora a qualidade da solução.
     - O log é construído por padrão individual (1 linha por padrão) para
-      facilitar análise e visualização em CSV.
-    """
-    sequencia_final = []
-    log_execucao = []
+      facilitar análise e visualização em CSV. Ele é colunar: {"Padrao", "Busca",
+      "DensidadeRegiao", "NMPA_Parcial"}, com componentes triviais e pequenos
+      registrados em uma única linha cujo "Padrao" é a lista de padrões.
 
-    for componente in nx.connected_components(grafo):
-        if not componente:
+    O CSR do grafo (csr, de construir_csr) pode ser informado para reaproveitar o já
+    construído por outra heurística; caso contrário é construído aqui.
+    """
+    # Ordem final acumulada em um array int32 pré-alocado com cursor de escrita; só é
+    # lida no fim, quando sequencia_final[:tamanho_final] vai para refinamento_minimo
+    sequencia_final = np.empty(grafo.number_of_nodes(), dtype=np.int32)
+    tamanho_final = 0
+    log_execucao = {"Padrao": [], "Busca": [], "DensidadeRegiao": [], "NMPA_Parcial": []}
+
+    # CSR do grafo inteiro, construído uma vez e compartilhado pelas buscas de todos os componentes
+    if csr is None:
+        csr = construir_csr(grafo)
+    indptr = csr[0]
+
+    # Matriz empacotada em bits uma única vez: todas as avaliações de NMPA da heurística a reutilizam
+    matPaPe_bits = empacotar_matriz(matPaPe)
+
+    # NMPA da sequência já montada. Componentes distintos não compartilham peças (as arestas
+    # ligam padrões com peça em comum), então acrescentar um componente resulta em
+    # max(NMPA anterior, NMPA do próprio componente), sem reavaliar o prefixo
+    nmpa_acumulado = 0
+
+    # Nós de cada componente na ordem de iteração de grafo.subgraph (só a visão de nós é
+    # usada), que define o desempate da ordenação rápida e dos nós iniciais do multi-start
+    componentes = [
+        np.fromiter(grafo.subgraph(componente), dtype=np.int32, count=len(componente))
+        for componente in nx.connected_components(grafo)
+    ]
+
+    # Nós iniciais do multi-start de todos os componentes, pontuados uma única vez no grafo inteiro
+    nos_iniciais_por_componente = precalcular_nos_iniciais(csr, componentes, matPaPe, top_k=3)
+
+    for indice_componente, nos in enumerate(componentes):
+        tamanho = len(nos)
+        if tamanho == 0:
             continue
 
-        subgrafo = grafo.subgraph(componente)
-        tamanho = len(componente)
-        densidade = nx.density(subgrafo)
+        # Densidade pelos graus no CSR: num componente conexo, todos os vizinhos são internos
+        graus = indptr[nos + 1] - indptr[nos]
+        num_arestas = int(np.sum(graus)) // 2
+        densidade = calcular_densidade(tamanho, num_arestas)
 
         # Caso trivial: componente com 1 nó
         if tamanho == 1:
-            no = next(iter(componente))
-            sequencia_final.append(no)
-            log_execucao.append({
-                "Padrao": [no],
-                "Busca": "Trivial",
-                "DensidadeRegiao": densidade,
-                "NMPA_Parcial": calcular_nmpa(sequencia_final, matPaPe)
-            })
+            no = int(nos[0])
+            sequencia_final[tamanho_final] = no
+            tamanho_final += 1
+            nmpa_acumulado = max(nmpa_acumulado, int(contar_bits(matPaPe_bits[no])))
+            log_execucao["Padrao"].append([no])
+            log_execucao["Busca"].append("Trivial")
+            log_execucao["DensidadeRegiao"].append(densidade)
+            log_execucao["NMPA_Parcial"].append(nmpa_acumulado)
             continue
 
         # Caso pequeno: ordenação rápida
-        elif tamanho <= 5:
-            seq = ordenacao_rapida(subgrafo, matPaPe)
-            sequencia_final.extend(seq)
-            log_execucao.append({
-                "Padrao": seq,
-                "Busca": "Ordenacao_Rapida",
-                "DensidadeRegiao": densidade,
-                "NMPA_Parcial": calcular_nmpa(sequencia_final, matPaPe)
-            })
+        if tamanho <= 5:
+            seq = ordenacao_rapida_graus(nos, graus, matPaPe)
+            sequencia_final[tamanho_final:tamanho_final + len(seq)] = seq
+            tamanho_final += len(seq)
+            nmpa_acumulado = max(nmpa_acumulado, int(calcular_nmpa_bits(seq, matPaPe_bits)))
+            log_execucao["Padrao"].append(seq)
+            log_execucao["Busca"].append("Ordenacao_Rapida")
+            log_execucao["DensidadeRegiao"].append(densidade)
+            log_execucao["NMPA_Parcial"].append(nmpa_acumulado)
             continue
 
         # Multi-start: testa vários nós iniciais
-        nos_iniciais = melhores_nos_iniciais(subgrafo, matPaPe, top_k=3)
-        melhores_seqs = []
+        nos_iniciais = nos_iniciais_por_componente[indice_componente]
 
-        for no_inicial in nos_iniciais:
-            if densidade > 0.4:
-                seq = bfs_adaptado(subgrafo, no_inicial, matPaPe)
-                tipo_busca = "BFS"
-            else:
-                seq = dfs_adaptado(subgrafo, no_inicial, matPaPe)
-                tipo_busca = "DFS"
+        # Similaridade entre os nós do componente calculada uma única vez e
+        # compartilhada pelas buscas de todos os nós iniciais
+        similaridade = matriz_similaridade(np.sort(nos), matPaPe)
 
-            nmpa_seq = calcular_nmpa(sequencia_final + seq, matPaPe)
-            melhores_seqs.append((nmpa_seq, seq, tipo_busca))
+        melhores_seqs = _avaliar_nos_iniciais(
+            csr, nos_iniciais, matPaPe, matPaPe_bits, densidade, similaridade, nmpa_acumulado
+        )
 
         # Seleciona a melhor sequência entre as 3 testadas
         melhores_seqs.sort(key=lambda x: x[0])
         melhor_nmpa, melhor_seq, tipo_busca = melhores_seqs[0]
 
         # Adiciona a sequência à final
-        sequencia_final.extend(melhor_seq)
+        sequencia_final[tamanho_final:tamanho_final + len(melhor_seq)] = melhor_seq
+        tamanho_final += len(melhor_seq)
+        nmpa_acumulado = melhor_nmpa
 
         # Log linha a linha (um padrão por linha no CSV)
-        for padrao in melhor_seq:
-            log_execucao.append({
-                "Padrao": padrao,
-                "Busca": tipo_busca,
-                "DensidadeRegiao": densidade,
-                "NMPA_Parcial": melhor_nmpa
-            })
-
-    # Aplica refinamento final na sequência montada
-    return refinamento_minimo(sequencia_final, matPaPe, modo="padrao"), log_execucao
\ No newline at end of file
+        log_execucao["Padrao"].extend(melhor_seq)
+        log_execucao["Busca"].extend([tipo_busca] * len(melhor_seq))
+        log_execucao["DensidadeRegiao"].extend([densidade] * len(melhor_seq))
+        log_execucao["NMPA_Parcial"].extend([melhor_nmpa] * len(melhor_seq))
+
+    # Aplica refinamento final na sequência montada (a busca limitada da DFS pode não
+    # cobrir todo o componente, por isso apenas as posições escritas são usadas)
+    sequencia_refinada = refinamento_minimo(sequencia_final[:tamanho_final], matPaPe, modo="padrao")
+    return sequencia_refinada, log_execucao
\ No newline at end of file
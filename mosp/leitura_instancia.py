@@ -19,6 +19,9 @@ Exemplo de uso:
 
 import numpy as np
 
+# Bytes de espaço em branco que separam os valores no arquivo (espaço, \t, \n, \v, \f, \r)
+_ESPACOS = np.frombuffer(b" \t\n\v\f\r", dtype=np.uint8)
+
 def criar_matriz_padroes_pecas(caminho_txt):
     """
     Lê um arquivo de instância do MOSP e retorna a matriz padrão x peça.
@@ -31,9 +34,34 @@ def criar_matriz_padroes_pecas(caminho_txt):
                 - Cada linha representa um padrão.
                 - Cada coluna representa uma peça.
                 - Valor 1 indica que o padrão utiliza a peça.
+                O dtype é sempre uint8 (1 byte por célula, 4x menos memória que
+                int32 nas varreduras da matriz), qualquer que seja o caminho de leitura.
+
+    Raises:
+        ValueError: Se algum valor da matriz estiver fora do intervalo 0..255 do uint8.
     """
     with open(caminho_txt, 'rb') as arquivo:
         num_padroes, num_pecas = [int(valor) for valor in arquivo.readline().split()]
-        matriz = np.genfromtxt(arquivo, dtype="int32", max_rows=num_padroes)
-    
-    return matriz
+        conteudo = arquivo.read()
+
+    total = num_padroes * num_pecas
+
+    # Caminho rápido: a matriz é binária e cada valor ocupa um único caractere, então os
+    # bytes do arquivo são lidos direto como um array, sem separar tokens em Python
+    caracteres = np.frombuffer(conteudo, dtype=np.uint8)
+    nao_espaco = ~np.isin(caracteres, _ESPACOS)
+    inicios = nao_espaco.copy()
+    inicios[1:] &= ~nao_espaco[:-1]
+    digitos = caracteres[nao_espaco]
+    if np.count_nonzero(inicios) == len(digitos) and np.all((digitos >= ord("0")) & (digitos <= ord("9"))):
+        valores = digitos[:total] - np.uint8(ord("0"))
+    else:
+        # Valores com mais de um caractere: conversão token a token, verificando o
+        # intervalo antes de reduzir ao mesmo uint8 do caminho rápido
+        tokens = conteudo.split(maxsplit=total)[:total]
+        valores = np.fromiter(map(int, tokens), dtype=np.int64, count=total)
+        if valores.min(initial=0) < 0 or valores.max(initial=0) > 255:
+            raise ValueError(f"Valores fora do intervalo 0..255 na instância: {caminho_txt}")
+        valores = valores.astype(np.uint8)
+
+    return valores.reshape(num_padroes, num_pecas)
@@ -1,7 +1,6 @@
 
 
 
-import networkx as nx
 import numpy as np
 
 
@@ -23,15 +22,33 @@ def ordenacao_rapida(subgrafo, matPaPe):
     if len(nos) <= 1:
         return nos
 
-    # Ordena por grau (prioriza nós com mais conexões)
-    nos.sort(key=lambda x: -subgrafo.degree(x))
+    graus = np.fromiter((grau for _, grau in subgrafo.degree(nos)), dtype=np.int64, count=len(nos))
+    return ordenacao_rapida_graus(nos, graus, matPaPe)
+
+def ordenacao_rapida_graus(nos, graus, matPaPe):
+    """
+    Mesma ordenação de ordenacao_rapida, a partir dos nós e de seus graus já calculados.
+
+    Permite ordenar um componente pelos graus do CSR do grafo inteiro (iguais aos do
+    subgrafo, já que o componente é conexo), sem construir uma view de subgrafo.
+    """
+    nos = np.asarray(nos)
+    if len(nos) <= 1:
+        return nos.tolist()
+
+    # Ordena por grau (prioriza nós com mais conexões); a ordenação estável mantém
+    # os empates na ordem original dos nós
+    nos = nos[np.argsort(-np.asarray(graus), kind="stable")]
+    if len(nos) == 2:
+        # Com um único nó restante, a ordenação por similaridade não tem o que reordenar
+        return nos.tolist()
     primeiro = nos[0]
 
-    # Ordena os restantes por similaridade com o primeiro
-    similares = [(x, np.sum(matPaPe[primeiro] & matPaPe[x])) for x in nos[1:]]
-    nos[1:] = [x for x, _ in sorted(similares, key=lambda par: -par[1])]
+    # Ordena os restantes por similaridade com o primeiro, todos de uma vez
+    similaridades = np.count_nonzero(matPaPe[primeiro] & matPaPe[nos[1:]], axis=1)
+    nos[1:] = nos[1:][np.argsort(-similaridades, kind="stable")]
 
-    return nos
+    return nos.tolist()
 
 def melhores_nos_iniciais(subgrafo, matPaPe, top_k = 3):
     """
@@ -44,12 +61,91 @@ def melhores_nos_iniciais(subgrafo, matPaPe, top_k = 3):
     - Permite aplicar a heurística Multi-Start (vários pontos de partida),
       aumentando a chance de encontrar uma boa sequência final.
     """
-    ranking = sorted(
-        subgrafo.nodes,
-        key=lambda no: (
-            0.6 * subgrafo.degree(no) +
-            0.4 * np.sum(matPaPe[no] > 0)
-        ),
-        reverse=True
-    )
-    return ranking[:top_k]
+    if top_k <= 0 or subgrafo.number_of_nodes() == 0:
+        return []
+
+    # Pontuação de todos os nós em uma única expressão vetorizada
+    nos = np.asarray(list(subgrafo.nodes))
+    graus = np.fromiter((grau for _, grau in subgrafo.degree(nos.tolist())), dtype=np.int64, count=len(nos))
+    pontuacao = 0.6 * graus + 0.4 * np.count_nonzero(matPaPe[nos] > 0, axis=1)
+
+    return nos[_top_k_estavel(pontuacao, top_k)].tolist()
+
+def precalcular_nos_iniciais(csr, componentes, matPaPe, top_k = 3):
+    """
+    Calcula os top-k nós iniciais de todos os componentes de uma só vez.
+
+    Estratégia:
+    - A pontuação de melhores_nos_iniciais (0.6 * grau + 0.4 * nº de peças) só depende
+      do grau no grafo inteiro (igual ao grau no subgrafo de um componente conexo) e da
+      matriz padrão-peça, então é calculada vetorialmente uma única vez.
+    - Em cada componente, os top-k saem de _top_k_estavel (np.partition + ordenação
+      estável só dos candidatos, mantendo os empates na ordem em que os nós do componente
+      são dados; passe-os na ordem de grafo.subgraph para reproduzir melhores_nos_iniciais).
+
+    Racional:
+    - Evita montar o ranking completo, nó a nó, em cada componente do multi-start.
+
+    Args:
+        csr: Par (indptr, indices) de grafo.construir_csr.
+        componentes: Sequência com os nós de cada componente (conjuntos ou arrays).
+        matPaPe: Matriz padrão-peça.
+        top_k: Número de nós iniciais por componente.
+
+    Returns:
+        Dicionário {índice do componente: lista com os top-k nós iniciais}.
+    """
+    indptr = csr[0]
+    pontuacao = 0.6 * np.diff(indptr) + 0.4 * np.count_nonzero(matPaPe > 0, axis=1)
+
+    nos_iniciais = {}
+    for i, componente in enumerate(componentes):
+        nos = np.fromiter(componente, dtype=np.int64, count=len(componente))
+        nos_iniciais[i] = nos[_top_k_estavel(pontuacao[nos], top_k)].tolist()
+
+    return nos_iniciais
+
+def _top_k_estavel(valores, top_k):
+    """
+    Índices dos top_k maiores valores, em ordem decrescente.
+
+    np.partition encontra o k-ésimo maior valor em O(n) e só os candidatos acima dele são
+    ordenados; a ordenação é estável, então empates ficam na ordem original (o mesmo
+    resultado de sorted(..., reverse=True)[:top_k]).
+    """
+    if top_k <= 0 or len(valores) == 0:
+        return np.empty(0, dtype=np.intp)
+    if len(valores) > top_k:
+        corte = np.partition(valores, len(valores) - top_k)[len(valores) - top_k]
+        candidatos = np.flatnonzero(valores >= corte)
+    else:
+        candidatos = np.arange(len(valores))
+    return candidatos[np.argsort(-valores[candidatos], kind="stable")][:top_k]
+
+def matriz_similaridade(nos, matPaPe):
+    """
+    Pré-calcula a similaridade de peças entre todos os pares de nós de um componente.
+
+    Estratégia:
+    - Extrai a submatriz padrão x peça dos nós do componente.
+    - Calcula S = sub @ sub.T: como a matriz é binária, S[i, j] é o número
+      de peças em comum entre os nós i e j (mesmo valor de np.sum(a & b)).
+
+    Racional:
+    - As buscas adaptadas recalculavam a similaridade linha a linha a cada
+      nó expandido, e o multi-start repete essas buscas para vários nós iniciais.
+    - Com a matriz pronta, cada similaridade passa a ser uma consulta O(1).
+
+    Returns:
+        (S, posicao): matriz de similaridade (k x k) e vetor que mapeia o índice
+        global de cada padrão para sua linha/coluna em S (-1 fora do componente).
+    """
+    nos = np.asarray(nos)
+    # float32 usa BLAS e é exato para contagens inteiras de peças
+    sub = matPaPe[nos].astype(np.float32)
+    S = (sub @ sub.T).astype(np.int32)
+
+    posicao = np.full(matPaPe.shape[0], -1, dtype=np.int32)
+    posicao[nos] = np.arange(len(nos), dtype=np.int32)
+
+    return S, posicao
@@ -1,8 +1,7 @@
 
 
 import numpy as np
-from .custo_nmpa import calcular_nmpa
-import itertools
+from .custo_nmpa import calcular_nmpa_bits, contar_bits, empacotar_matriz
 
 def refinamento_minimo(sequencia, matPaPe, modo = "padrao"):
     """
@@ -10,31 +9,80 @@ def refinamento_minimo(sequencia, matPaPe, modo = "padrao"):
 
     Estratégia:
     - Testa se inverter a sequência melhora o NMPA.
-    - Em seguida, tenta fazer trocas locais entre pares vizinhos.
+    - Em seguida, tenta fazer trocas locais entre pares vizinhos; cada troca é avaliada
+      por diferença (veja _nmpa_trocas_vizinhas), sem recalcular o NMPA da sequência toda.
 
     Racional:
     - Refinamentos simples ajudam a corrigir falhas das heurísticas,
       sem custo computacional elevado.
+
+    A sequência (lista ou array) é copiada uma única vez para um array int32 próprio,
+    que indexa diretamente a matriz empacotada e recebe as trocas no lugar; o retorno é
+    sempre uma lista nova, sem compartilhar memória com a sequência recebida.
     """
+    sequencia = np.array(sequencia, dtype=np.int32)
     if len(sequencia) <= 3:
-        return sequencia
+        return sequencia.tolist()
+
+    # Todas as avaliações usam a mesma matriz: empacota em bits uma única vez
+    matPaPe_bits = empacotar_matriz(matPaPe)
 
-    nmpa_original = calcular_nmpa(sequencia, matPaPe)
+    nmpa_original = calcular_nmpa_bits(sequencia, matPaPe_bits)
     sequencia_invertida = sequencia[::-1]
-    nmpa_invertido = calcular_nmpa(sequencia_invertida, matPaPe)
+    nmpa_invertido = calcular_nmpa_bits(sequencia_invertida, matPaPe_bits)
 
     if nmpa_invertido < nmpa_original:
-        return sequencia_invertida
+        return sequencia_invertida.tolist()
 
-    melhor_seq = sequencia.copy()
+    melhor_seq = sequencia
     melhor_nmpa = nmpa_original
 
-    for i in range(len(sequencia) - 1):
-        nova_seq = melhor_seq.copy()
-        nova_seq[i], nova_seq[i + 1] = nova_seq[i + 1], nova_seq[i]
-        novo_nmpa = calcular_nmpa(nova_seq, matPaPe)
+    # Trocas de vizinhos avaliadas por diferença: trocar as posições i e i+1 só altera as
+    # pilhas abertas nessas duas etapas, então o NMPA candidato é o máximo entre o prefixo
+    # (até i-1), o sufixo (a partir de i+2) e as duas etapas recalculadas. Todas as trocas
+    # restantes são avaliadas de uma vez; a primeira que melhora é aplicada e a varredura
+    # continua a partir da posição seguinte, como no laço troca a troca
+    inicio = 0
+    while inicio < len(melhor_seq) - 1:
+        candidatos = _nmpa_trocas_vizinhas(matPaPe_bits[melhor_seq])[inicio:]
+        melhoras = np.flatnonzero(candidatos < melhor_nmpa)
+        if len(melhoras) == 0:
+            break
+
+        # melhor_seq é a cópia feita na entrada: a troca aceita é feita no lugar
+        i = inicio + int(melhoras[0])
+        melhor_seq[i], melhor_seq[i + 1] = melhor_seq[i + 1], melhor_seq[i]
+        melhor_nmpa = candidatos[melhoras[0]]
+        inicio = i + 1
+
+    return melhor_seq.tolist()
+
+def _nmpa_trocas_vizinhas(linhas_bits):
+    """
+    NMPA resultante de cada troca de vizinhos (i, i+1) de uma sequência.
+
+    Args:
+        linhas_bits: Linhas empacotadas (uint64) dos padrões, na ordem de produção.
+
+    Returns:
+        Array com len(linhas_bits) - 1 posições: a posição i é o NMPA da sequência
+        com os padrões i e i+1 trocados.
+    """
+    n = len(linhas_bits)
+    vazio = np.zeros((1, linhas_bits.shape[1]), dtype=linhas_bits.dtype)
+
+    # frente[k] = OR das linhas 0..k-1 e tras[k] = OR das linhas k..n-1 (com bordas vazias)
+    frente = np.concatenate((vazio, np.bitwise_or.accumulate(linhas_bits, axis=0)))
+    tras = np.concatenate((np.bitwise_or.accumulate(linhas_bits[::-1], axis=0)[::-1], vazio))
+
+    # Pilhas abertas por etapa na sequência atual e seus máximos de prefixo e de sufixo
+    abertas = contar_bits(frente[1:] & tras[:-1])
+    max_prefixo = np.concatenate(([0], np.maximum.accumulate(abertas)))              # máximo de 0..k-1
+    max_sufixo = np.concatenate((np.maximum.accumulate(abertas[::-1])[::-1], [0]))   # máximo de k..n-1
 
-        if novo_nmpa < melhor_nmpa:
-            melhor_seq, melhor_nmpa = nova_seq, novo_nmpa
+    # Com i e i+1 trocados: a etapa i produz a linha i+1 e a etapa i+1 produz a linha i
+    atual, proxima = linhas_bits[:-1], linhas_bits[1:]
+    etapa_i = contar_bits((frente[:n - 1] | proxima) & tras[:n - 1])
+    etapa_seguinte = contar_bits(frente[2:] & (atual | tras[2:]))
 
-    return melhor_seq
+    return np.maximum.reduce([max_prefixo[:n - 1], etapa_i, etapa_seguinte, max_sufixo[2:]])
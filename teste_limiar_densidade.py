@@ -10,14 +10,18 @@ Motivação:
     - Ambas utilizavam o parâmetro 'limiar_densidade' para decidir entre aplicar BFS ou DFS em cada subgrafo.
     - Este teste de sensibilidade explora diferentes valores de limiar para analisar como o NMPA varia em cada uma dessas abordagens.
     - Embora atualmente a heuristica_hibrida_adaptativa tenha sido descontinuada no benchmark principal, o teste é mantido aqui para documentação dos experimentos exploratórios conduzidos.
+    - As duas heurísticas não existem mais em mosp/heuristicas.py; o teste usa as sucessoras atuais:
+        - heuristica_hibrida_adaptativa_pico no lugar de heuristica_hibrida_adaptativa (coluna "NMPA_Hibrida").
+        - heuristica_hibrida_comunidades no lugar de heuristica_comunidades_adaptativa (coluna "NMPA_Comunidades").
 
 Fluxo:
-    - Lê cada instância da pasta "cenarios/"
+    - Lê cada instância da pasta "cenarios/" (matriz e grafo construídos uma única vez por instância);
+      as instâncias são processadas em paralelo, uma por processo
     - Para cada valor de limiar definido:
-        - Aplica heuristica_hibrida_adaptativa
-        - Aplica heuristica_comunidades_adaptativa
+        - Aplica heuristica_hibrida_adaptativa_pico
+        - Aplica heuristica_hibrida_comunidades
         - Calcula o NMPA de cada ordem
-    - Armazena os resultados em um CSV separado: "resultados/teste_limiar_densidade.csv"
+    - Grava os resultados, à medida que são calculados, em um CSV separado: "resultados/teste_limiar_densidade.csv"
 
 Como rodar:
     python teste_limiar_densidade.py
@@ -29,64 +33,96 @@ Notas importantes:
 
 import os
 import csv
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import pandas as pd
 
 from mosp.leitura_instancia import criar_matriz_padroes_pecas
-from mosp.grafo import construir_grafo
+from mosp.grafo import construir_grafo, construir_csr
 from mosp.custo_nmpa import calcular_nmpa
-from mosp.heuristicas import heuristica_hibrida_adaptativa, heuristica_comunidades_adaptativa
+from mosp.heuristicas import heuristica_hibrida_adaptativa_pico, heuristica_hibrida_comunidades
 
-def teste_limiar_densidade(pasta_instancias, limiares, caminho_saida_csv):
+def _testar_instancia(caminho_instancia, limiares):
     """
-    Executa o teste de sensibilidade para o limiar de densidade.
+    Testa todos os limiares de densidade em uma instância.
+
+    A leitura da instância e a construção do grafo não dependem do limiar: a instância
+    é preparada uma única vez e testada com todos os limiares.
 
     Args:
-        pasta_instancias: Caminho da pasta onde estão os arquivos .txt das instâncias.
+        caminho_instancia: Caminho do arquivo .txt da instância.
         limiares: Lista de valores de limiar de densidade a serem testados.
-        caminho_saida_csv: Caminho do arquivo CSV de saída.
+
+    Returns:
+        Lista com uma linha do CSV por limiar, na ordem de `limiares`.
     """
-    resultados = []
+    nome_instancia = os.path.basename(caminho_instancia).replace(".txt", "")
 
-    for limiar in limiares:
-        print(f"\nTestando limiar de densidade = {limiar}")
+    print(f"\nProcessando instância: {nome_instancia}")
 
-        for arquivo in os.listdir(pasta_instancias):
-            if arquivo.endswith(".txt"):
-                nome_instancia = arquivo.replace(".txt", "")
-                caminho_instancia = os.path.join(pasta_instancias, arquivo)
+    # 1. Ler a matriz padrão × peça
+    matriz = criar_matriz_padroes_pecas(caminho_instancia)
 
-                print(f"    Processando instância: {nome_instancia}")
+    # 2. Construir o grafo padrão-padrão
+    grafo = construir_grafo(matriz)
+    csr = construir_csr(grafo)
 
-                # 1. Ler a matriz padrão × peça
-                matriz = criar_matriz_padroes_pecas(caminho_instancia)
+    linhas = []
+    for limiar in limiares:
+        print(f"    {nome_instancia}: testando limiar de densidade = {limiar}")
 
-                # 2. Construir o grafo padrão-padrão
-                grafo = construir_grafo(matriz)
+        # 3. Aplicar heurísticas adaptativas com o limiar atual
+        ordem_hibrida, _ = heuristica_hibrida_adaptativa_pico(grafo, matriz, limiar_densidade=limiar, csr=csr)
+        ordem_comunidades, _ = heuristica_hibrida_comunidades(grafo, limiar_densidade=limiar, csr=csr)
 
-                # 3. Aplicar heurísticas adaptativas com o limiar atual
-                ordem_hibrida, _ = heuristica_hibrida_adaptativa(grafo, limiar_densidade=limiar)
-                ordem_comunidades, _ = heuristica_comunidades_adaptativa(grafo, limiar_densidade=limiar)
+        # 4. Calcular NMPA
+        nmpa_hibrida = calcular_nmpa(ordem_hibrida, matriz)
+        nmpa_comunidades = calcular_nmpa(ordem_comunidades, matriz)
 
-                # 4. Calcular NMPA
-                nmpa_hibrida = calcular_nmpa(ordem_hibrida, matriz)
-                nmpa_comunidades = calcular_nmpa(ordem_comunidades, matriz)
+        # 5. Guardar a linha do resultado
+        linhas.append({
+            "Instancia": nome_instancia,
+            "Limiar_Densidade": limiar,
+            "NMPA_Hibrida": nmpa_hibrida,
+            "NMPA_Comunidades": nmpa_comunidades
+        })
 
-                # 5. Armazenar resultado
-                resultados.append({
-                    "Instancia": nome_instancia,
-                    "Limiar_Densidade": limiar,
-                    "NMPA_Hibrida": nmpa_hibrida,
-                    "NMPA_Comunidades": nmpa_comunidades
-                })
+    return linhas
 
-    # 6. Escrever resultados no CSV
+def teste_limiar_densidade(pasta_instancias, limiares, caminho_saida_csv, max_processos=None):
+    """
+    Executa o teste de sensibilidade para o limiar de densidade.
+
+    Args:
+        pasta_instancias: Caminho da pasta onde estão os arquivos .txt das instâncias.
+        limiares: Lista de valores de limiar de densidade a serem testados.
+        caminho_saida_csv: Caminho do arquivo CSV de saída.
+        max_processos: Número de processos do pool (None usa os.cpu_count()).
+    """
+    caminhos_instancias = [
+        os.path.join(pasta_instancias, arquivo)
+        for arquivo in os.listdir(pasta_instancias)
+        if arquivo.endswith(".txt")
+    ]
+
+    # As linhas de cada instância são gravadas assim que a instância termina: a memória não
+    # cresce com a grade instâncias x limiares e os resultados parciais sobrevivem a uma interrupção
     os.makedirs(os.path.dirname(caminho_saida_csv), exist_ok=True)
     with open(caminho_saida_csv, mode='w', newline='') as f:
         writer = csv.DictWriter(f, fieldnames=[
             "Instancia", "Limiar_Densidade", "NMPA_Hibrida", "NMPA_Comunidades"
         ])
         writer.writeheader()
-        writer.writerows(resultados)
+
+        # As instâncias são independentes: cada uma é uma tarefa do pool de processos.
+        # executor.map devolve os resultados na ordem de submissão, então o CSV sai na
+        # mesma ordem da execução sequencial
+        with ProcessPoolExecutor(max_workers=max_processos) as executor:
+            for linhas in executor.map(_testar_instancia, caminhos_instancias, repeat(limiares)):
+                writer.writerows(linhas)
+
+                # Descarrega no disco ao fim de cada instância
+                f.flush()
 
     print(f"\nTeste de limiar de densidade finalizado.")
     print(f"Resultados salvos em: {caminho_saida_csv}")
@@ -99,4 +135,4 @@ if __name__ == "__main__":
         pasta_instancias="cenarios",
         limiares=lista_limiares,
         caminho_saida_csv="resultados/teste_limiar_densidade.csv"
-    )
\ No newline at end of file
+    )